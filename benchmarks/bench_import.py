@@ -0,0 +1,23 @@
+"""Startup cost of `import pyeviews` in a fresh interpreter."""
+import subprocess
+import sys
+
+# comtypes blocked: the import must work without it (as off Windows)
+IMPORT = ("import sys; sys.modules['comtypes'] = None; import pyeviews; "
+          "print(' '.join(sorted(name for name in "
+          "('comtypes', 'numpy', 'pandas', 'pkg_resources') "
+          "if sys.modules.get(name) is not None)))")
+
+def _Import():
+    return subprocess.run([sys.executable, '-c', IMPORT], check=True,
+                          capture_output=True, text=True).stdout.strip()
+
+def bench_import(benchmark):
+    loaded = benchmark.pedantic(_Import, rounds=10)
+    # nothing heavy is loaded until a function needs it
+    assert loaded == ''
+
+def bench_interpreter(benchmark):
+    # baseline for bench_import: the bare interpreter start
+    benchmark.pedantic(subprocess.run, ([sys.executable, '-c', 'pass'],),
+                       {'check': True}, rounds=10)
@@ -0,0 +1,277 @@
+"""Timings and COM call counts of the PutPythonAsWF/GetWFAsPython paths."""
+import numpy as np
+import pandas as pa
+import pytest
+
+import pyeviews as evp
+
+# EViews frequency of a page pulled back from each pandas frequency
+PAGE_FREQS = {'YS': 'A', 'QS': 'Q', 'MS': 'M', 'W': 'W', 'B': 'D5',
+              'D': 'D7', 'min': 'Min'}
+
+# observations per frequency (kept inside the pandas Timestamp range)
+FREQ_OBS = {'YS': 250, 'QS': 1000, 'MS': 3000, 'W': 10000, 'B': 20000,
+            'D': 20000, 'min': 20000}
+
+def _Numeric(nrows, ncols, index=None):
+    values = np.random.default_rng(0).standard_normal((nrows, ncols))
+    return pa.DataFrame(values, index=index,
+                        columns=['x' + str(col) for col in range(ncols)])
+
+def _Wide():
+    return _Numeric(250, 500, pa.date_range('1990', periods=250, freq='MS'))
+
+def _Tall():
+    return _Numeric(200000, 4)
+
+def _Dated(freq):
+    nrows = FREQ_OBS[freq]
+    return _Numeric(nrows, 4, pa.date_range('2000-01-03', periods=nrows, 
+                                            freq=freq))
+
+def _Alpha():
+    words = np.array(['alpha', 'beta', 'gamma', 'delta', 'epsilon'],
+                     dtype=object)
+    frame = _Numeric(20000, 2)
+    for col in range(10):
+        frame['a' + str(col)] = words[np.arange(20000) % (col % 4 + 2)]
+    return frame
+
+def _Attrs():
+    frame = _Wide()
+    frame.attrs = dict(('attr' + str(key), 'value' + str(key))
+                       for key in range(10))
+    return frame
+
+def _Panel(ngroups=2000, nperiods=25, shuffle=True):
+    index = pa.MultiIndex.from_product(
+        [['id' + str(group) for group in range(ngroups)], 
+         range(1990, 1990 + nperiods)], names=['crossid', 'year'])
+    frame = _Numeric(len(index), 5, index)
+    if shuffle:     # rows arriving in time order, not grouped
+        frame = frame.sort_index(level=1, sort_remaining=False)
+    return frame
+
+SHAPES = {'wide': _Wide, 'tall': _Tall, 'panel': _Panel, 'alpha': _Alpha,
+          'attrs': _Attrs}
+
+def _PageFreq(frame):
+    if isinstance(frame.index, pa.DatetimeIndex):
+        return 'M'
+    return 'U'
+
+@pytest.mark.parametrize('shape', sorted(SHAPES))
+def bench_put(measure, app, shape):
+    frame = SHAPES[shape]()
+    measure(evp.PutPythonAsWF, frame, app=app)
+
+@pytest.mark.parametrize('shape', ['wide', 'tall', 'panel'])
+def bench_put_bulk(measure, app, shape):
+    frame = SHAPES[shape]()
+    measure(evp.PutPythonAsWF, frame, app=app, bulk=True)
+
+def _Typed():
+    # built from 1-D arrays, so every column is contiguous in the frame
+    # (columns of a frame built from a 2-D array may be strided)
+    nrows = 200000
+    values = np.random.default_rng(0).standard_normal((2, nrows))
+    return pa.DataFrame({
+        'x0': values[0], 'x1': values[1],
+        'small': np.arange(nrows, dtype=np.int64),
+        'large': np.arange(nrows, dtype=np.int64) + 2**31,
+        'word': np.array(['alpha', 'beta'], dtype=object)[
+            np.arange(nrows) % 2]})
+
+def bench_put_buffers(measure, app):
+    # marshal= hands PutSeries the raw data instead of a VARIANT
+    frame = _Typed()
+    measure(evp.PutPythonAsWF, frame, app=app, marshal=lambda data: data)
+    sent = app.objects
+    # contiguous float64 columns go over without a copy
+    assert sent['X0'].dtype == np.float64
+    assert np.shares_memory(sent['X0'], frame['x0'].to_numpy())
+    assert (sent['X1'] == frame['x1'].to_numpy()).all()
+    # int64 goes over as int32 when it fits, as float64 when it doesn't
+    assert sent['SMALL'].dtype == np.int32
+    assert (sent['SMALL'] == frame['small'].to_numpy()).all()
+    assert sent['LARGE'].dtype == np.float64
+    assert (sent['LARGE'] == frame['large'].to_numpy()).all()
+    assert sent['WORD'] == frame['word'].tolist()
+
+@pytest.mark.parametrize('freq', sorted(PAGE_FREQS))
+def bench_put_freq(measure, app, freq):
+    measure(evp.PutPythonAsWF, _Dated(freq), app=app)
+
+def bench_put_panel_10k_groups(measure, app):
+    measure(evp.PutPythonAsWF, _Panel(10000, 10), app=app)
+
+def bench_put_panel_10k_groups_concat(benchmark):
+    # baseline for bench_put_panel_10k_groups: the per-group concat the
+    # panel push used to regroup rows with, before any data was sent
+    frame = _Panel(10000, 10)
+    def regroup():
+        return pa.concat([frame.loc[item] for item in 
+                          frame.index.get_level_values(0).unique()])
+    benchmark(regroup)
+
+def bench_put_chunks(benchmark, measure, app):
+    # streaming push: one PutSeries per column and window of rows
+    frame = _Tall()
+    measure(evp.PutPythonChunksAsWF, frame, len(frame), app=app, 
+            chunk_obs=20000)
+    assert benchmark.extra_info['calls']['PutSeries'] == 4 * 10
+    assert (app.objects['X3'] == frame['x3'].to_numpy()).all()
+
+def bench_sync_append(benchmark, measure, app):
+    # delta push of 12 new months onto a page synced before
+    frame = _Dated('MS')
+    evp.SyncPythonAsWF(frame.iloc[:-12], app=app, key='bench')
+    state = dict(evp._syncstate[id(app)])
+    pushed = dict(app.objects)
+    nobs = app.nobs
+    def sync():
+        evp._syncstate[id(app)].update(state)
+        app.objects = dict(pushed)
+        app.nobs = nobs
+        evp.SyncPythonAsWF(frame, app=app, key='bench')
+    measure(sync)
+    # one Get checks the page is still the synced one, one records it
+    assert benchmark.extra_info['calls'] == {'Get': 2, 'Run': 1, 
+                                             'PutSeries': 4}
+    assert (app.objects['X0'] == frame['x0'].to_numpy()).all()
+    # once another push has replaced the page, the next sync starts over
+    evp.SyncPythonAsWF(frame.iloc[:-12], app=app, key='bench')
+    evp.PutPythonAsWF(_Numeric(10, 1), app=app)
+    evp.SyncPythonAsWF(frame, app=app, key='bench')
+    assert (app.objects['X0'] == frame['x0'].to_numpy()).all()
+
+def bench_create_minute_10m(benchmark):
+    # the create command of a long regular intraday index
+    index = pa.date_range('2000-01-03', periods=10000000, freq='min')
+    def build():
+        evp._RegularCreateSpec.cache_clear()
+        return evp._BuildFromPandas(index)
+    benchmark(build)
+
+def _Pull(app, **kwargs):
+    # cold pull: no page index reused from a previous run
+    evp.ClearPageCache(app)
+    return evp.GetWFAsPython(app=app, **kwargs)
+
+@pytest.mark.parametrize('shape', sorted(SHAPES))
+def bench_get(measure, app, shape):
+    frame = SHAPES[shape]()
+    if shape == 'panel':
+        frame = frame.sort_index()
+    app.Load(frame, _PageFreq(frame),
+             dict((col, frame.attrs) for col in frame.columns))
+    measure(_Pull, app)
+
+@pytest.mark.parametrize('freq', sorted(PAGE_FREQS))
+def bench_get_freq(measure, app, freq):
+    frame = _Dated(freq)
+    app.Load(frame, PAGE_FREQS[freq])
+    measure(_Pull, app)
+
+def bench_get_cached_index(measure, app):
+    frame = _Dated('MS')
+    app.Load(frame, 'M')
+    measure(evp.GetWFAsPython, app=app)
+
+def bench_get_cached_panel(benchmark, measure, app):
+    # repeat pulls reuse the panel index: the ids are not transferred
+    frame = _Panel(200, 10).sort_index()
+    app.Load(frame)
+    evp.ClearPageCache(app)
+    evp.GetWFAsPython(app=app)
+    measure(evp.GetWFAsPython, app=app)
+    assert benchmark.extra_info['calls']['GetGroup'] == 1
+    # a structural command drops it, so relabeled ids are picked up
+    frame = frame.rename(lambda label: 'new' + label, level=0)
+    app.Load(frame)
+    evp.Run('pagestruct crossid year', app)
+    assert evp.GetWFAsPython(app=app).index.equals(frame.index)
+
+@pytest.mark.parametrize('chunk_series', [50, 500])
+def bench_iter(measure, app, chunk_series):
+    frame = _Wide()
+    app.Load(frame, 'M')
+    def pull():
+        evp.ClearPageCache(app)
+        return list(evp.IterWFAsPython(app=app, chunk_series=chunk_series))
+    measure(pull)
+
+@pytest.mark.parametrize('app', [0.0005], indirect=True)
+def bench_get_attrs_latency(benchmark, measure, app):
+    # with COM latency, attributes must cost a fixed number of calls
+    frame = _Attrs()
+    app.Load(frame, 'M', dict((col, frame.attrs) for col in frame.columns))
+    measure(_Pull, app)
+    assert benchmark.extra_info['total_calls'] < 20
+
+def _Mixed():
+    frame = _Alpha()
+    frame['when'] = pa.date_range('2000', periods=len(frame), freq='h')
+    return frame
+
+@pytest.mark.parametrize('alphas', ['object', 'category', 'string'])
+@pytest.mark.parametrize('dtype', [None, 'float32'])
+def bench_get_dtypes(benchmark, measure, app, alphas, dtype):
+    app.Load(_Mixed())
+    frame = measure(_Pull, app, alphas=alphas, dtype=dtype)
+    benchmark.extra_info['memory'] = int(frame.memory_usage(deep=True).sum())
+
+@pytest.mark.parametrize('shape', ['wide', 'tall', 'alpha'])
+def bench_get_wfcache(measure, app, tmp_path, shape):
+    # repeat loads of an unchanged workfile come from the local cache
+    frame = SHAPES[shape]()
+    app.Load(frame, _PageFreq(frame))
+    wfname = tmp_path / 'archive.wf1'
+    wfname.write_bytes(b'')
+    cache = evp.WFCache(str(tmp_path / 'cache'))
+    evp.GetWFAsPython(app=app, wfname=str(wfname), cache=cache)
+    measure(evp.GetWFAsPython, app=app, wfname=str(wfname), cache=cache)
+
+def _Commands(ncommands):
+    return ['series s' + str(num) + ' = ' + str(num) 
+            for num in range(ncommands)]
+
+@pytest.mark.parametrize('app', [0.0005], indirect=True)
+def bench_run_each(benchmark, measure, app):
+    # baseline for bench_run_batch: one COM call per command
+    def run():
+        for command in _Commands(1000):
+            evp.Run(command, app)
+        evp.Get('=1', app)
+    measure(run)
+    assert benchmark.extra_info['total_calls'] == 1001
+
+@pytest.mark.parametrize('app', [0.0005], indirect=True)
+def bench_run_batch(benchmark, measure, app):
+    # 1000 commands with a Get halfway: program, Get, program
+    def run():
+        commands = _Commands(1000)
+        with evp.Batch(app) as batch:
+            for command in commands[:500]:
+                batch.Run(command)
+            batch.Get('=1')
+            for command in commands[500:]:
+                batch.Run(command)
+    measure(run)
+    assert benchmark.extra_info['total_calls'] == 3
+
+def bench_get_wfcache_dates(measure, app, tmp_path):
+    # dates before 1677 (outside datetime64[ns]) come back from the cache
+    # with the same values and unit as from EViews
+    index = pa.date_range('1500-01-01', periods=500, freq='YS')
+    frame = _Numeric(500, 2, index)
+    frame['when'] = index + pa.Timedelta(days=1)
+    app.Load(frame, 'A')
+    wfname = tmp_path / 'archive.wf1'
+    wfname.write_bytes(b'')
+    cache = evp.WFCache(str(tmp_path / 'cache'))
+    pulled = evp.GetWFAsPython(app=app, wfname=str(wfname), cache=cache)
+    cached = measure(evp.GetWFAsPython, app=app, wfname=str(wfname), 
+                     cache=cache)
+    assert sum(app.calls.values()) == 0
+    pa.testing.assert_frame_equal(cached, pulled)
@@ -0,0 +1,28 @@
+"""Fixtures for the pyeviews benchmarks (run with: pytest benchmarks)."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(__file__))
+from fakeapp import FakeApp, InstallComStandIn
+
+# pyeviews imports comtypes lazily; the stand-in only has to provide
+# automation.tagVARIANT by the time a pull or push runs
+InstallComStandIn()
+
+@pytest.fixture
+def app(request):
+    """Fake EViews app; parametrize with latency (seconds per call)"""
+    return FakeApp(latency=getattr(request, 'param', 0.0))
+
+@pytest.fixture
+def measure(benchmark, app):
+    """Benchmark func() and report the COM calls made by one run"""
+    def run(func, *args, **kwargs):
+        app.ResetCalls()
+        func(*args, **kwargs)
+        benchmark.extra_info['calls'] = dict(app.calls)
+        benchmark.extra_info['total_calls'] = sum(app.calls.values())
+        return benchmark(func, *args, **kwargs)
+    return run
@@ -0,0 +1,214 @@
+"""fakeapp: In-process stand-in for the EViews COM app used by the benchmarks.
+
+FakeApp answers the Run/Get/GetSeries/GetGroup/Put/PutSeries/Lookup calls
+pyeviews makes, sleeping `latency` seconds per call to mimic the COM round
+trip, and counts the calls per method. Pushed data is kept as-is, except
+that pushes with a sample are written into those rows of a float64 series;
+pages to pull are set up with Load().
+"""
+import collections
+import fnmatch
+import re
+import sys
+import time
+import types
+
+import numpy as np
+import pandas as pa
+
+def InstallComStandIn():
+    """Provide a minimal comtypes where the real one can't be imported"""
+    try:
+        import comtypes.automation
+        import comtypes.client
+        return False
+    except (ImportError, OSError):    # not on Windows
+        pass
+    comtypes = types.ModuleType('comtypes')
+    client = types.ModuleType('comtypes.client')
+    automation = types.ModuleType('comtypes.automation')
+    class tagVARIANT(object):
+        def __init__(self, value):
+            self.value = value
+    def CreateObject(progid):
+        raise OSError('EViews is not available: ' + str(progid))
+    automation.tagVARIANT = tagVARIANT
+    client.CreateObject = CreateObject
+    comtypes.automation = automation
+    comtypes.client = client
+    comtypes.CoInitialize = lambda: None
+    comtypes.CoUninitialize = lambda: None
+    sys.modules['comtypes'] = comtypes
+    sys.modules['comtypes.client'] = client
+    sys.modules['comtypes.automation'] = automation
+    return True
+
+def _Value(data):
+    """Unwrap a VARIANT (real or stand-in)"""
+    return getattr(data, 'value', data)
+
+class FakeApp(object):
+    """Simulated EViews app with configurable per-call latency"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = collections.Counter()
+        self.objects = {}
+        self.Load(pa.DataFrame(index=pa.RangeIndex(0)))
+
+    def Load(self, frame, pgfreq='U', attrs=None):
+        """Make frame the current page (pgfreq is the EViews frequency)"""
+        self.pgfreq = pgfreq
+        self.index = frame.index
+        self.nobs = len(frame.index)
+        self.ispanel = int(isinstance(frame.index, pa.MultiIndex))
+        self.series = {}
+        self.alphas = {}
+        for col in frame.columns:
+            values = frame[col].to_numpy()
+            if values.dtype.kind in 'iuf':
+                self.series[str(col).upper()] = values.astype(np.float64)
+            elif values.dtype.kind == 'M':  # date-formatted series
+                self.series[str(col).upper()] = frame[col].astype(object)
+            else:
+                self.alphas[str(col).upper()] = values.astype(object)
+        if self.ispanel:
+            for level, name in enumerate(frame.index.names):
+                values = frame.index.get_level_values(level)
+                values = values.astype(object).to_numpy()
+                self.series[str(name).upper()] = values
+        self.attrs = dict((str(name).upper(), dict(values))
+                          for name, values in (attrs or {}).items())
+
+    def ResetCalls(self):
+        self.calls.clear()
+
+    def _Call(self, method):
+        self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _Rows(self, smpl, nobs=None):
+        """Translate an EViews sample into a row slice"""
+        nobs = len(self.index) if nobs is None else nobs
+        match = re.match(r'@first\+(\d+) @first\+(\d+)', str(smpl))
+        if match:
+            return slice(int(match.group(1)), int(match.group(2)) + 1)
+        match = re.match(r'@last-(\d+) @last', str(smpl))
+        if match:
+            return slice(nobs - int(match.group(1)) - 1, None)
+        return slice(None)
+
+    def Run(self, command):
+        self._Call('Run')
+        command = str(command)
+        if command.startswith('exec '):
+            with open(command.split('"')[1]) as prg:
+                self._Program(prg.read().splitlines())
+        elif command.startswith(('create ', 'pagecreate ')):
+            self.objects = {}
+            # dated pages take their length from the first full push
+            words = command.split()
+            self.nobs = int(words[2]) if words[1] == 'u' else None
+        elif command.startswith('pagestruct(end=@last+'):
+            extra = int(re.match(r'pagestruct\(end=@last\+(\d+)\)',
+                                 command).group(1))
+            for name, values in self.objects.items():
+                if isinstance(values, np.ndarray) and len(values) == self.nobs:
+                    self.objects[name] = np.concatenate(
+                        [values, np.full(extra, np.nan)])
+            self.nobs = self.nobs + extra
+        elif command.startswith('delete '):
+            for name in command.split()[1:]:
+                self.objects.pop(name.upper(), None)
+
+    def _Program(self, lines):
+        """Simulate the programs pyeviews runs via exec"""
+        # attribute collection: fill the TEMP string with all records
+        target = None
+        for line in lines:
+            if line.startswith('string '):
+                target = line.split()[1]
+                self.objects[target] = ''
+            match = re.match(r'%attrs = @attrnames\("\*", "(.*)"\)', line)
+            if match and target is not None:
+                var = match.group(1).upper()
+                for key, value in self.attrs.get(var, {}).items():
+                    self.objects[target] = (self.objects.get(target, '') +
+                                            var + chr(31) + str(key) +
+                                            chr(31) + str(value) + chr(30))
+
+    def Get(self, expression):
+        self._Call('Get')
+        expression = str(expression)
+        if expression.startswith('=@wfname'):
+            return self._PageInfo()
+        if expression.startswith('=@getnextname'):
+            prefix = expression.split('"')[1]
+            return prefix + '01'
+        if expression.startswith('=@pageexist'):
+            return 1
+        if expression.startswith('='):
+            return 1
+        return self.objects.get(expression, '')
+
+    def _PageInfo(self):
+        """Page description: name, freq, range, ids, date range/checksum"""
+        nobs = len(self.index)
+        pageids = ''
+        dates = ['NA', 'NA', 'NA']
+        if self.ispanel:
+            pageids = ' '.join(str(name).upper() for name in self.index.names)
+        elif isinstance(self.index, pa.DatetimeIndex) and nobs:
+            # EViews date numbers count days from 1/1/0001
+            days = (self.index - pa.Timestamp('1970-01-01')) / \
+                   pa.Timedelta(days=1) + 719162
+            dates = [self.index.min().strftime('%Y-%m-%d %H:%M:%S'),
+                     self.index.max().strftime('%Y-%m-%d %H:%M:%S'),
+                     '%.6f' % np.sum(days.to_numpy())]
+        return '|'.join(['BENCH', 'PAGE1', self.pgfreq, str(self.ispanel),
+                         str(nobs), '1', str(nobs), pageids] + dates)
+
+    def Lookup(self, namefilter, kind, mode=1):
+        self._Call('Lookup')
+        names = self.series if kind == 'series' else self.alphas
+        return tuple(name for name in names
+                     if fnmatch.fnmatch(name, str(namefilter).upper()))
+
+    def GetSeries(self, name, smpl=None):
+        self._Call('GetSeries')
+        if name == '@date':
+            return tuple(self.index[self._Rows(smpl)].to_pydatetime())
+        return tuple(self.series[str(name).upper()][self._Rows(smpl)])
+
+    def GetGroup(self, names, smpl):
+        self._Call('GetGroup')
+        rows = self._Rows(smpl)
+        columns = []
+        for name in str(_Value(names)).split():
+            name = name.upper()
+            if name in self.series:
+                columns.append(self.series[name][rows])
+            else:
+                columns.append(self.alphas[name][rows])
+        # COM hands back a tuple of row tuples
+        return tuple(zip(*[column.tolist() for column in columns]))
+
+    def PutSeries(self, name, data, smpl=None):
+        self._Call('PutSeries')
+        name = str(name).upper()
+        if smpl is None:
+            self.objects[name] = _Value(data)
+            if self.nobs is None:
+                self.nobs = len(self.objects[name])
+            return
+        values = self.objects.get(name)
+        if values is None:
+            values = np.full(self.nobs, np.nan)
+        values = np.array(values, dtype=np.float64)
+        values[self._Rows(smpl, self.nobs)] = _Value(data)
+        self.objects[name] = values
+
+    def Put(self, name, data):
+        self._Call('Put')
+        self.objects[str(name).upper()] = _Value(data)
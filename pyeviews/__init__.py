@@ -1,20 +1,82 @@
 """pyeviews: Use EViews directly from python."""
+import contextlib
 import fnmatch
+import functools
 import gc
+import hashlib
+import importlib
+import os
 import re
 import logging
-from pkg_resources import get_distribution
-from comtypes.client import CreateObject
-from comtypes import automation
-import numpy as np
-import pandas as pa
+import tempfile
+import weakref
+from pyeviews.instrument import InstrumentedApp
+from pyeviews.pool import EViewsPool
+from pyeviews.wfcache import WFCache
 
-_dist = get_distribution('pyeviews')
-__version__ = _dist.version
+class _LazyModule(object):
+    """Module proxy that imports the module on first attribute access"""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# heavy (and Windows-only) dependencies load on first use, so that
+# `import pyeviews` stays cheap and works without comtypes
+automation = _LazyModule('comtypes.automation')
+np = _LazyModule('numpy')
+pa = _LazyModule('pandas')
+
+def __getattr__(name):
+    """Look up __version__ only when asked for"""
+    if name == '__version__':
+        from importlib import metadata
+        try:
+            version = metadata.version('pyeviews')
+        except metadata.PackageNotFoundError:   # running from a checkout
+            version = 'unknown'
+        globals()['__version__'] = version
+        return version
+    raise AttributeError("module 'pyeviews' has no attribute " + repr(name))
 
 # default app if users don't want to specify their own
 globalevapp = None
 
+# period-end to period-start conversions (EViews dates periods by start)
+_PERIOD_START = {
+    'A': lambda dts: dts + pa.DateOffset(years=-1, days=1),
+    'BA': lambda dts: dts - pa.tseries.offsets.BYearEnd() 
+                      + pa.tseries.offsets.BDay(),
+    'Q': lambda dts: dts - pa.tseries.offsets.QuarterEnd() 
+                     + pa.DateOffset(days=1),
+    'BQ': lambda dts: dts - pa.tseries.offsets.BQuarterEnd() 
+                      + pa.tseries.offsets.BDay(),
+    'M': lambda dts: dts - pa.tseries.offsets.MonthEnd() 
+                     + pa.DateOffset(days=1),
+    'BM': lambda dts: dts - pa.tseries.offsets.BMonthEnd() 
+                      + pa.tseries.offsets.BDay()}
+
+
+# page indexes already built, per app and page description
+_pagecache = {}
+_PAGECACHE_SIZE = 32
+
+# last state pushed by SyncPythonAsWF, per app (by id, dropped when the
+# app is collected) and sync key
+_syncstate = {}
+
+# commands that change workfile/page structure and void cached indexes
+_STRUCTURAL_COMMANDS = ('create', 'wfcreate', 'wfopen', 'wfuse', 'wfclose', 
+                        'open', 'load', 'expand', 'pagecreate', 'pagedelete', 
+                        'pagestruct', 'pagestretch', 'pageload', 'pagecopy', 
+                        'pagerename', 'pageappend', 'pagecontract', 
+                        'pagestack', 'pageunstack', 'pagejoin', 'range')
+
 def _BuildFromPython(objlen, newwf=True):
     """Construct EViews command for undated wf"""
     result = "create "  if newwf else "pagecreate "
@@ -23,11 +85,57 @@ def _BuildFromPython(objlen, newwf=True):
 
 def _BuildFromPandas(obj, newwf=True):
     """Construct EViews command for dated wf"""
-    elem_cnt = len(obj)
+    # first part of the EViews command
+    result = "create " if newwf else "pagecreate "
+    freq = obj.freq
+    if freq is not None and not _IsCustomOffset(freq):
+        # regular index: the spec only depends on freq and endpoints
+        return result + _RegularCreateSpec(freq.freqstr, obj[0], obj[-1])
     # parse the frequency string
     freq_str_all = obj.freqstr  # dated
     if freq_str_all == None:
         freq_str_all = pa.infer_freq(obj)
+    return result + _CreateSpec(freq_str_all, obj[0], obj[-1], 
+                                _IndexSample(obj))
+
+def _IsCustomOffset(freq):
+    """Is freq an offset whose parameters (holidays, hours) freqstr loses?"""
+    return isinstance(freq, (pa.offsets.CustomBusinessDay, 
+                             pa.offsets.BusinessHour, 
+                             pa.offsets.CustomBusinessHour))
+
+@functools.lru_cache(maxsize=256)
+def _RegularCreateSpec(freqstr, first, last):
+    """Memoized create spec for a regular DatetimeIndex"""
+    # a regular intraday index repeats its weekdays/times every week,
+    # so a week's worth of leading dates stands in for the full index
+    step = _WeekSteps(pa.tseries.frequencies.to_offset(freqstr))
+    if step is None:
+        sample = pa.date_range(first, periods=3, freq=freqstr)
+    else:
+        sample = pa.date_range(first, periods=step, freq=freqstr)
+        sample = sample[sample <= last]
+    return _CreateSpec(freqstr, first, last, sample)
+
+def _WeekSteps(freq):
+    """Number of fixed-size steps covering one week (None if not fixed)"""
+    if not isinstance(freq, pa.offsets.Tick):
+        return None
+    week = pa.Timedelta(days=7)
+    delta = pa.Timedelta(freq)
+    if week % delta != pa.Timedelta(0):
+        return None
+    return week // delta + 1
+
+def _IndexSample(obj):
+    """Leading dates of a regular index that span one week, else the index"""
+    step = _WeekSteps(obj.freq) if obj.freq is not None else None
+    if step is None:
+        return obj
+    return obj[:step]
+
+def _CreateSpec(freq_str_all, first, last, sample):
+    """Construct the frequency/range part of the EViews create command"""
     # check frequency string for custom spacing
     spacing = None
     search_obj = re.search(r'(\d*)(.*)', freq_str_all)
@@ -43,72 +151,49 @@ def _BuildFromPandas(obj, newwf=True):
     # - if necessary, convert index to be start of period since 
     # EViews uses the beginning of the period and 
     # we'll have misaligned dates in EViews otherwise
-    # - need to separate business freqs from regular otherwise get 
-    # misaligned subtractions/additions of dates
-    # - note that the DateOffset calculations (sometimes?) give performance warnings
-    # fix with resample?
-    if freq_str == 'A':
-        dtr = pa.DatetimeIndex(obj + pa.DateOffset(years=-1, days=1), 
-                               freq = "infer")
-        return _BuildFromPandas(dtr, newwf)
-    elif freq_str == 'BA':
-        dtr = pa.DatetimeIndex(obj - pa.tseries.offsets.BYearEnd() 
-                               + pa.tseries.offsets.BDay(), freq = "infer")
-        return _BuildFromPandas(dtr, newwf)
-    elif freq_str == 'Q':
-        dtr = pa.DatetimeIndex(obj - pa.tseries.offsets.QuarterEnd() 
-                               + pa.DateOffset(days=1), freq = "infer")
-        return _BuildFromPandas(dtr, newwf)
-    elif freq_str == 'BQ':
-        dtr = pa.DatetimeIndex(obj - pa.tseries.offsets.BQuarterEnd() 
-                               + pa.tseries.offsets.BDay(), freq = "infer")
-        return _BuildFromPandas(dtr, newwf)
-    elif freq_str == 'M':
-        dtr = pa.DatetimeIndex(obj - pa.tseries.offsets.MonthEnd() 
-                               + pa.DateOffset(days=1), freq = "infer")
-        return _BuildFromPandas(dtr, newwf)
-    elif freq_str == 'BM':
-        dtr = pa.DatetimeIndex(obj - pa.tseries.offsets.BMonthEnd() 
-                               + pa.tseries.offsets.BDay(), freq = "infer")
-        return _BuildFromPandas(dtr, newwf)
-    # first part of the EViews command
-    result = "create " if newwf else "pagecreate "
+    # - only the endpoints and enough leading dates to infer the
+    # shifted frequency are converted, not the whole index
+    if freq_str in _PERIOD_START:
+        shift = _PERIOD_START[freq_str]
+        head = pa.DatetimeIndex(shift(sample[:3]), freq = "infer")
+        ends = shift(pa.DatetimeIndex([first, last]))
+        head_freq = head.freqstr
+        if head_freq == None:
+            head_freq = pa.infer_freq(head)
+        return _CreateSpec(head_freq, ends[0], ends[1], head)
+    result = ""
     # construct the time period strings
-    yr_begin = str(obj[0].year)
-    yr_end = str(obj[elem_cnt - 1].year)
-    mo_begin = str(obj[0].month)
-    mo_end = str(obj[elem_cnt - 1].month)
-    day_begin = str(obj[0].day)
-    day_end = str(obj[elem_cnt - 1].day)
+    yr_begin = str(first.year)
+    yr_end = str(last.year)
+    mo_begin = str(first.month)
+    mo_end = str(last.month)
+    day_begin = str(first.day)
+    day_end = str(last.day)
     date_begin = mo_begin + '/' + day_begin + '/' + yr_begin + ' '
     date_end = mo_end + '/' + day_end + '/' + yr_end + ' '
     # may need some extra processing for custom business days
-    missingbdays = _MissingElements(list(set(obj.dayofweek)))
+    missingbdays = _MissingElements(sorted(set(sample.dayofweek)))
     # +1 for first custom day in sequence, +1 bc EV d.o.w. has Mon = 1
     if missingbdays:
         dow_begin = str(missingbdays[-1] + 1 + 1) 
         dow_end = str(missingbdays[0])
     else:
-        dow_begin = str(obj.dayofweek.min() + 1)
-        dow_end = str(obj.dayofweek.max() + 1)
-    time_begin = str(obj[0].strftime('%H')) + ':' + \
-                 str(obj[0].strftime('%M')) + ':' + \
-                 str(obj[0].strftime('%S')) + ' '
-    time_end = str(obj[elem_cnt - 1].strftime('%H')) + ':' + \
-               str(obj[elem_cnt - 1].strftime('%M')) + ':' + \
-               str(obj[elem_cnt - 1].strftime('%S')) + ' '
-    time_min = str(obj.hour.min()) + ':' + \
-               str(obj.minute.min()) + ':' + \
-               str(obj.second.min())
-    time_max = str(obj.hour.max()) + ':' + \
-               str(obj.minute.max()) + ':' + \
-               str(obj.second.max())    
+        dow_begin = str(sample.dayofweek.min() + 1)
+        dow_end = str(sample.dayofweek.max() + 1)
+    time_begin = first.strftime('%H:%M:%S') + ' '
+    time_end = last.strftime('%H:%M:%S') + ' '
+    time_min = str(sample.hour.min()) + ':' + \
+               str(sample.minute.min()) + ':' + \
+               str(sample.second.min())
+    time_max = str(sample.hour.max()) + ':' + \
+               str(sample.minute.max()) + ':' + \
+               str(sample.second.max())    
     # yearly
-    if (freq_str in ['AS', 'A', 'BAS', 'BA'] and \
+    if (freq_str in ['YS', 'AS', 'A', 'BYS', 'BAS', 'BA'] and \
         spacing in ['2', '3', '4', '5', '6', '7', '8', '9', '10', '20']):
             # month alignment not allowed for multi-year freqs in EViews
             result = result + spacing + 'a ' + date_begin + date_end
-    elif (freq_str in ['AS', 'A', 'BAS', 'BA'] and not spacing):
+    elif (freq_str in ['YS', 'AS', 'A', 'BYS', 'BAS', 'BA'] and not spacing):
         result = result + 'a' + freq_str_sp + date_begin + date_end
     # quarterly
     elif (freq_str in ['QS', 'Q', 'BQS', 'BQ'] and not spacing):
@@ -165,6 +250,208 @@ def _CheckReservedNames(names):
     if 'resid' in names:
         raise ValueError('resid is not an allowed name for a series.')
 
+def _DecodeGroup(grp, ncols, nnumeric):
+    """Convert a GetGroup result into numeric and alpha 2-D blocks"""
+    # numeric columns always come first, so an all-numeric group
+    # converts straight to float64 (EViews NA arrives as None -> NaN)
+    if nnumeric == ncols:
+        try:
+            numeric = np.array(grp, dtype=np.float64).reshape(-1, ncols)
+            return numeric, np.empty((numeric.shape[0], 0), dtype=object), {}
+        except (TypeError, ValueError):
+            pass    # date-valued series arrive as datetimes
+    block = np.array(grp, dtype=object).reshape(-1, ncols)
+    numeric, dates = _DecodeNumeric(block[:, :nnumeric])
+    return numeric, block[:, nnumeric:], dates
+
+def _DecodeNumeric(block):
+    """Convert numeric series to float64, setting aside date-valued ones"""
+    try:
+        return block.astype(np.float64), {}
+    except (TypeError, ValueError):
+        pass
+    # only the columns that fail to convert are dates
+    numeric = np.full(block.shape, np.nan)
+    dates = {}
+    for col in range(block.shape[1]):
+        try:
+            numeric[:, col] = block[:, col].astype(np.float64)
+        except (TypeError, ValueError):
+            dates[col] = pa.to_datetime(block[:, col]).to_numpy()
+    return numeric, dates
+
+def _EViewsDates(values):
+    """Convert EViews date numbers (days since 1/1/0001) to datetime64"""
+    # 719162 days from 1/1/0001 to 1/1/1970, NaN/out of range become NaT
+    return pa.to_datetime(values - 719162, unit='D', 
+                          errors='coerce').to_numpy()
+
+def _AlphaColumn(values, alphas):
+    """Convert an alpha series to the requested pandas type"""
+    if alphas == 'category':
+        return pa.Categorical(values)
+    if alphas == 'string':
+        return pa.array(values, dtype='string')
+    return values
+
+def _GroupAsFrame(grp, names, nnumeric, idx, alphas='object', datecols=(), 
+                  dtype=None):
+    """Build a DataFrame from a GetGroup result in one pass"""
+    if alphas not in ('object', 'category', 'string'):
+        raise ValueError('Unsupported alphas option: ' + str(alphas))
+    numeric, alpha, dates = _DecodeGroup(grp, len(names), nnumeric)
+    numnames = list(names[:nnumeric])
+    # numeric series holding EViews date numbers
+    wanted = set(str(name).upper() for name in datecols)
+    for col, name in enumerate(numnames):
+        if col not in dates and str(name).upper() in wanted:
+            dates[col] = _EViewsDates(numeric[:, col])
+    if dtype is not None:
+        numeric = numeric.astype(dtype, copy=False)
+    dfr = pa.DataFrame(numeric, index=idx, columns=numnames, copy=False)
+    for col, values in dates.items():
+        dfr[numnames[col]] = values
+    if alpha.shape[1]:
+        alphanames = list(names[nnumeric:])
+        if alphas == 'object':
+            alphadf = pa.DataFrame(alpha, index=idx, columns=alphanames)
+        else:
+            alphadf = pa.DataFrame(dict(
+                (name, _AlphaColumn(alpha[:, col], alphas)) 
+                for col, name in enumerate(alphanames)), index=idx)
+        dfr = pa.concat([dfr, alphadf], axis=1)
+    return dfr
+
+def _EnableNumpyInterop():
+    """Let comtypes build typed SAFEARRAYs directly from NumPy buffers"""
+    # explicit opt-in since comtypes 1.2, always on before that
+    import comtypes
+    npsupport = getattr(comtypes, 'npsupport', None)
+    if npsupport is not None and hasattr(npsupport, 'enable'):
+        npsupport.enable()
+
+def _MarshalVariant(data):
+    """Default marshaller: wrap data in a VARIANT for COM transfer"""
+    # ndarrays become VT_ARRAY|VT_R8 / VT_ARRAY|VT_I4 SAFEARRAYs filled 
+    # with a single memmove, lists become VT_ARRAY|VT_VARIANT
+    if isinstance(data, np.ndarray):
+        _EnableNumpyInterop()
+    return automation.tagVARIANT(data)
+
+def _ColumnBuffer(values):
+    """Return a contiguous float64/int32 buffer for numeric data, or None"""
+    if isinstance(values, (pa.Series, pa.Index)):
+        values = values.to_numpy()
+    if not isinstance(values, np.ndarray) or values.ndim != 1:
+        return None
+    if values.dtype.kind == 'f':
+        # no copy when the column is already contiguous float64
+        return np.ascontiguousarray(values, dtype=np.float64)
+    if values.dtype.kind in 'iu':
+        int32 = np.iinfo(np.int32)
+        if len(values) == 0 or (values.min() >= int32.min and 
+                                values.max() <= int32.max):
+            return np.ascontiguousarray(values, dtype=np.int32)
+        return np.ascontiguousarray(values, dtype=np.float64)
+    return None
+
+def _Marshaller(app, marshal=None):
+    """Return the marshaller to use for app (default: VARIANTs)"""
+    if marshal is None:
+        marshal = _MarshalVariant
+    # let instrumented apps see the data before it becomes a VARIANT
+    if isinstance(app, InstrumentedApp):
+        marshal = app.WrapMarshal(marshal)
+    return marshal
+
+def _Phase(app, name):
+    """Time a phase of a transfer when app is instrumented"""
+    if isinstance(app, InstrumentedApp):
+        return app.Phase(name)
+    return contextlib.nullcontext()
+
+def _PutColumn(app, name, values, marshal=None, smpl=None):
+    """Push one column of data into an EViews series"""
+    marshal = _Marshaller(app, marshal)
+    # numeric data goes over as a typed buffer, everything else as a list
+    data = _ColumnBuffer(values)
+    if data is None:
+        data = values.tolist() if hasattr(values, 'tolist') else values
+    if smpl is None:
+        app.PutSeries(name, marshal(data))
+    else:
+        app.PutSeries(name, marshal(data), smpl)
+
+def _RunProgram(app, lines):
+    """Run a list of EViews commands as one program (single round trip)"""
+    fd, path = tempfile.mkstemp(prefix='pyev', suffix='.prg')
+    try:
+        with os.fdopen(fd, 'w') as prg:
+            prg.write('\n'.join(lines) + '\n')
+        app.Run('exec "' + path + '"')
+    finally:
+        os.remove(path)
+
+def _PutFrameBulk(app, frame, attrs, marshal=None):
+    """Push a DataFrame as one matrix and split it into series in EViews"""
+    marshal = _Marshaller(app, marshal)
+    numeric = [col for col in frame.columns 
+               if frame[col].dtype.kind in 'iuf']
+    # alpha/object columns can't travel inside a matrix
+    for col in frame.columns:
+        if col not in numeric:
+            _PutColumn(app, col, frame[col], marshal)
+    lines = []
+    if numeric:
+        matname = app.Get('=@getnextname("PYEVMAT")')
+        block = np.asfortranarray(frame[numeric].to_numpy(dtype=np.float64))
+        app.Put(matname, marshal(block))
+        lines.append('%grp = @getnextname("PYEVGRP")')
+        lines.extend('series ' + str(col) for col in numeric)
+        # keep program lines short for very wide frames
+        for start in range(0, len(numeric), 100):
+            names = ' '.join(str(col) for col in numeric[start:start + 100])
+            if start == 0:
+                lines.append('group {%grp} ' + names)
+            else:
+                lines.append('{%grp}.add ' + names)
+        lines.append('mtos(' + matname + ', {%grp})')
+        lines.append('delete ' + matname + ' {%grp}')
+    # coalesce every attribute assignment into the same program
+    for col in frame.columns:
+        for key, value in attrs.items():
+            lines.append(str(col) + '.setattr(' + str(key) + ') ' + str(value))
+    if lines:
+        _RunProgram(app, lines)
+
+def _GetAttrs(app, names):
+    """Fetch the attributes of many series with one program"""
+    result = {}
+    if len(names) == 0:
+        return result
+    # collect every name/attribute/value triple into one string object,
+    # fields separated by chr(31) and records by chr(30)
+    tempvar = str(app.Get('=@getnextname("TEMP")'))
+    lines = ['string ' + tempvar + ' = ""']
+    for var in names:
+        var = str(var).strip()
+        lines.append('%attrs = @attrnames("*", "' + var + '")')
+        lines.append('if %attrs <> "" then')
+        lines.append('for %attr {%attrs}')
+        lines.append(tempvar + ' = ' + tempvar + ' + "' + var + 
+                     '" + @chr(31) + %attr + @chr(31) + ' + var + 
+                     '.@attr(%attr) + @chr(30)')
+        lines.append('next')
+        lines.append('endif')
+    _RunProgram(app, lines)
+    packed = app.Get(tempvar)
+    app.Run('delete ' + tempvar)
+    for record in (packed or '').split(chr(30)):
+        fields = record.split(chr(31))
+        if len(fields) == 3:
+            result.setdefault(fields[0], {})[fields[1]] = fields[2]
+    return result
+
 def _GetApp(app=None):
     """Return app (user-defined or default)"""
     global globalevapp
@@ -179,49 +466,70 @@ def Cleanup():
     global globalevapp
     if globalevapp is not None:
         globalevapp = None
+    _pagecache.clear()
+    _syncstate.clear()
     gc.collect()
 
-def PutPythonAsWF(obj, app=None, newwf=True):
+def ClearPageCache(app=None):
+    """Forget the cached page indexes (of one app, or of all apps).
+
+    Structural commands sent through Run, Batch or the Put functions clear
+    the cache themselves. Call this after changing panel id values or the
+    workfile structure some other way, e.g. with app.Run directly.
+    """
+    if app is None:
+        _pagecache.clear()
+    else:
+        _pagecache.pop(id(app), None)
+
+def PutPythonAsWF(obj, app=None, newwf=True, marshal=None, bulk=False):
     """Push Python data to EViews."""
     app = _GetApp(app)
     # which python data structure is obj?
     if (isinstance(obj, pa.core.frame.DataFrame) and not isinstance(obj.index, pa.MultiIndex)):
         #create a new EViews workfile with the right frequency
-        if obj.index.inferred_type == "datetime64": # dated
-            create = _BuildFromPandas(obj.index, newwf)  
-        else:                                       # undated
-            create = _BuildFromPython(len(obj.index), newwf)
-        app.Run(create)
+        with _Phase(app, 'index'):
+            if obj.index.inferred_type == "datetime64": # dated
+                create = _BuildFromPandas(obj.index, newwf)  
+            else:                                       # undated
+                create = _BuildFromPython(len(obj.index), newwf)
+        Run(create, app)
         _CheckReservedNames(obj.columns)
-        # loop through all columns, push each into EViews as a list
-        for col in obj.columns:
-            col_data = automation.tagVARIANT(obj[col].tolist())
-            app.PutSeries(col, col_data)
-            # check if df has attributes, and if so, copy into each series
-            if obj.attrs:   
-                for key, value in obj.attrs.items():    
-                    app.Run(str(col) + '.setattr(' + str(key) + ') ' + str(value))
+        if bulk:
+            # one matrix transfer plus one program for the whole frame
+            with _Phase(app, 'transfer'):
+                _PutFrameBulk(app, obj, obj.attrs, marshal)
+            return
+        # loop through all columns, push each into EViews as a typed buffer
+        with _Phase(app, 'transfer'):
+            for col in obj.columns:
+                _PutColumn(app, col, obj[col], marshal)
+                # check if df has attributes, and if so, copy into each series
+                if obj.attrs:   
+                    for key, value in obj.attrs.items():    
+                        app.Run(str(col) + '.setattr(' + str(key) + ') ' + str(value))
     elif (isinstance(obj, pa.core.series.Series) and not isinstance(obj.index, pa.MultiIndex)):
         #create a new EViews workfile with the right frequency
-        if obj.index.inferred_type == "datetime64": # dated
-            create = _BuildFromPandas(obj.index, newwf)
-        else:                                       # undated    
-            create = _BuildFromPython(len(obj.index), newwf)
-        app.Run(create)
-        # push the data into EViews as a list
+        with _Phase(app, 'index'):
+            if obj.index.inferred_type == "datetime64": # dated
+                create = _BuildFromPandas(obj.index, newwf)
+            else:                                       # undated    
+                create = _BuildFromPython(len(obj.index), newwf)
+        Run(create, app)
+        # push the data into EViews as a typed buffer
         name = "series"
         if obj.name:
             name = obj.name
             _CheckReservedNames([name])
-        data = automation.tagVARIANT(obj.tolist())
-        app.PutSeries(name, data)
+        with _Phase(app, 'transfer'):
+            _PutColumn(app, name, obj, marshal)
         if obj.attrs:
             for key, value in obj.attrs.items():
                 app.Run(str(name) + '.setattr(' + str(key) + ') ' + str(value))
     elif isinstance(obj, pa.core.indexes.datetimes.DatetimeIndex):
         #create a new EViews workfile with the right frequency
         create = _BuildFromPandas(obj, newwf)
-        app.Run(create)
+        Run(create, app)
     elif isinstance(obj, pa.DataFrame) and isinstance(obj.index, pa.MultiIndex):
         collevels = obj.columns.nlevels
         idxlevels = obj.index.nlevels
@@ -233,19 +541,27 @@ def PutPythonAsWF(obj, app=None, newwf=True):
             #newcollabels = obj.columns.map(lambda x: '_'.join([str(i) for i in x]))
             raise ValueError("Only one column level is allowed. You have " + collevels + ".")
         # create a new EViews workfile with the right frequency
-        if obj.index.get_level_values(1).inferred_type == "datetime64":                # dated
-            create = _BuildFromPandas(obj.index.get_level_values(1), newwf)            # total rows
-        else:                                                                          # undated    
-            create = _BuildFromPython(len(obj.index.get_level_values(1)), newwf)       # total rows
-        app.Run(create)
-        # concatenate items into single dataframe
-        result = pa.concat([obj.loc[item] for item in obj.index.get_level_values(0).unique()])
-        result.columns = result.columns.str.replace(" ", "_")
+        with _Phase(app, 'index'):
+            if obj.index.get_level_values(1).inferred_type == "datetime64":                # dated
+                create = _BuildFromPandas(obj.index.get_level_values(1), newwf)            # total rows
+            else:                                                                          # undated    
+                create = _BuildFromPython(len(obj.index.get_level_values(1)), newwf)       # total rows
+        Run(create, app)
+        # group the rows by cross-section with one stable sort on the
+        # level codes (cross-sections in order of first appearance)
+        with _Phase(app, 'assembly'):
+            codes = pa.factorize(obj.index.get_level_values(0))[0]
+            if len(codes) > 1 and (codes[1:] < codes[:-1]).any():
+                obj = obj.take(np.argsort(codes, kind='stable'))
+            result = obj.set_axis(obj.columns.str.replace(" ", "_"), axis=1)
         _CheckReservedNames(result.columns)
-        # loop through and push each column into EViews as a list
-        for col in result.columns:
-            col_data = automation.tagVARIANT(result[col].tolist())
-            app.PutSeries(col, col_data)  
+        with _Phase(app, 'transfer'):
+            if bulk:
+                _PutFrameBulk(app, result, {}, marshal)
+            else:
+                # loop through and push each column into EViews as a typed buffer
+                for col in result.columns:
+                    _PutColumn(app, col, result[col], marshal)
         # handle index names
         if obj.index.names:
             groupname = obj.index.names[0]
@@ -254,21 +570,21 @@ def PutPythonAsWF(obj, app=None, newwf=True):
             groupname = "groupid"
             cellname = "cellid"
         # structure the workfile
-        app.PutSeries(groupname, automation.tagVARIANT(obj.index.get_level_values(0).tolist()))
-        app.PutSeries(cellname, automation.tagVARIANT(obj.index.get_level_values(1).tolist()))
-        app.Run('pagestruct(bal=m) ' + groupname + ' ' + cellname)
+        with _Phase(app, 'transfer'):
+            _PutColumn(app, groupname, obj.index.get_level_values(0), marshal)
+            _PutColumn(app, cellname, obj.index.get_level_values(1), marshal)
+        Run('pagestruct(bal=m) ' + groupname + ' ' + cellname, app)
     elif isinstance(obj, pa.core.indexes.range.RangeIndex):
         length = len(obj)
         create = _BuildFromPython(length, newwf)
-        app.Run(create) # non-standard start/stop/step information currently being lost
+        Run(create, app) # non-standard start/stop/step information currently being lost
     elif isinstance(obj, list):
         # create a new undated workfile with the right length
         length = len(obj)
         create = _BuildFromPython(length, newwf)
-        app.Run(create)
+        Run(create, app)
         # push the data into EViews as a list
-        data = automation.tagVARIANT(obj)
-        app.PutSeries("series", data)
+        _PutColumn(app, "series", obj, marshal)
     elif isinstance(obj, dict):
         # create a new undated workfile with the right length
         maxlength = 0
@@ -280,61 +596,152 @@ def PutPythonAsWF(obj, app=None, newwf=True):
             if length > maxlength:
                 maxlength = length
         create = _BuildFromPython(maxlength, newwf)
-        app.Run(create)
+        Run(create, app)
         _CheckReservedNames(obj.keys())
-        # loop through the dict and push the data into EViews as a list
+        # loop through the dict and push the data into EViews
         for key in obj:
-            data = automation.tagVARIANT(obj[key])
-            app.PutSeries(str(key), data)
+            _PutColumn(app, str(key), obj[key], marshal)
     elif isinstance(obj, np.ndarray):
         # create a new undated workfile with the right length
         create = _BuildFromPython(obj.shape[0], newwf)
-        app.Run(create)
-        # loop through the array, push the data into EViews as a list
+        Run(create, app)
+        # loop through the array, push the data into EViews as typed buffers
         # note that nested arrays may not be transferred properly
         # is it a structured array?
         if obj.dtype.names:
             for name in obj.dtype.names:
-                data = automation.tagVARIANT(obj[name].tolist())
-                app.PutSeries(name, data)
+                _PutColumn(app, name, obj[name], marshal)
+        elif bulk:
+            names = ["series" + str(col_num) for col_num in range(obj.shape[1])]
+            _PutFrameBulk(app, pa.DataFrame(obj, columns=names, copy=False), 
+                          {}, marshal)
         else:
             for col_num in range(obj.shape[1]):
-                name = "series" + str(col_num)
-                data = automation.tagVARIANT(obj[:, col_num].tolist())
-                app.PutSeries(name, data)        
+                _PutColumn(app, "series" + str(col_num), obj[:, col_num], 
+                           marshal)
     else:
         raise ValueError('Unsupported type: ' + str(type(obj)))
 
-def GetWFAsPython(app=None, wfname='', pagename='', namefilter='*'):
-    """Move EViews data to Python."""
-    app = _GetApp(app)
-    # EViews : pandas
-    dt_map = {'D5':'B', '5':'B', 'D7':'D', '7':'D', 'D':'D',
-              'W':'W', 'T':'10D', 'F':'2W', 'M':'MS', 'Q':'QS',
-              'S':'6M', 'A':'AS', 'Y':'AS',
-              'H':'H', 'Min':'T', 'Sec':'S'} # also 'D7':'D', 'Min':'min'
+def _SelectPage(app, wfname='', pagename=''):
+    """Load the workfile and select the page to read from"""
     # load the workfile 
     if wfname != '':
-        app.Run("wfuse " + '"' + wfname + '"') # needs full pathname
+        Run("wfuse " + '"' + wfname + '"', app) # needs full pathname
     if pagename:
         #change workfile page to specified page name
         if app.Get('=@pageexist("' + str(pagename) + '")') == 1:
-            app.Run("pageselect " + str(pagename))
+            Run("pageselect " + str(pagename), app)
         else:
             raise ValueError('Invalid pagename: ' + str(pagename))
-    # get workfile frequency
-    pgfreq = app.Get("=@pagefreq")
+
+def _PageInfo(app):
+    """Return the page description used as the index cache key"""
+    # one Get for everything that identifies the page and its index: the
+    # date range and an @date checksum catch changed dates, @pageids a
+    # restructured panel
+    info = app.Get('=@wfname + "|" + @pagename + "|" + @pagefreq + "|" + '
+                   '@str(@ispanel) + "|" + @str(@obsrange) + "|" + '
+                   '@otod(1) + "|" + @otod(@obsrange) + "|" + @pageids + '
+                   '"|" + @datestr(@min(@date), "YYYY-MM-DD HH:MI:SS") + '
+                   '"|" + @datestr(@max(@date), "YYYY-MM-DD HH:MI:SS") + '
+                   '"|" + @str(@sum(@date), "f.6")')
+    return tuple(str(info).split('|'))
+
+def _PageLayout(app, namefilter='*'):
+    """Return page frequency, panel flag, series names and index"""
+    pageinfo = _PageInfo(app)
+    pgfreq = pageinfo[2]
+    ispanel = int(float(pageinfo[3]))
     # reset sample range to all
     app.Run("smpl @all")
-    # is the workfile a panel?
-    ispanel = app.Get("=@ispanel")
     # get series names as a 1-dim array
     snames = app.Lookup(namefilter, "series", 1)
     anames = app.Lookup(namefilter, "alpha", 1)
-    names = snames + anames
-    wflength = app.Get("=@obsrange")
-    #if not snames:
-    #    raise ValueError('No series objects found.')
+    # reuse the index built for an unchanged page (entries are dropped
+    # whenever a structural command goes through Run)
+    pages = _pagecache.setdefault(id(app), {})
+    idx = pages.get(pageinfo)
+    if idx is None:
+        idx = _PageIndex(app, pageinfo)
+        if len(pages) >= _PAGECACHE_SIZE:
+            pages.pop(next(iter(pages)))
+        pages[pageinfo] = idx
+    return pgfreq, ispanel, snames, anames, idx
+
+def _RegularIndex(pgfreq, wflength, first, last):
+    """Build a regular-frequency page index locally, or return None"""
+    search_obj = re.search(r'(\d*)(\w*)', pgfreq)
+    spacing = search_obj.group(1)
+    freq_str = search_obj.group(2)
+    if pgfreq in ['D5', '5', 'D7', '7']:
+        spacing = ''
+    elif '(' in pgfreq or freq_str not in ['A', 'Y', 'S', 'Q', 'M', 'F', 'W']:
+        # irregular/custom frequencies need the @date series
+        return None
+    # the first/last dates (from the page description) are all we need
+    first, last = pa.Timestamp(first), pa.Timestamp(last)
+    month = first.strftime('%b').upper()
+    # quarters keep the canonical QS-JAN/QS-FEB/QS-MAR anchor
+    qmonth = ('JAN', 'FEB', 'MAR')[(first.month - 1) % 3]
+    weekday = first.strftime('%a').upper()
+    # EViews : pandas, anchored on the first date
+    freq_map = {'D5':'B', '5':'B', 'D7':'D', '7':'D',
+                'A':'YS-' + month, 'Y':'YS-' + month, 'S':'6MS', 
+                'Q':'QS-' + qmonth, 'M':'MS', 
+                'F':'2W-' + weekday, 'W':'W-' + weekday}
+    if pgfreq in freq_map:
+        freq = freq_map[pgfreq]
+    else:
+        freq = spacing + freq_map[freq_str]
+    idx = pa.date_range(first, periods=wflength, freq=freq)
+    if len(idx) != wflength or idx[-1] != last:
+        return None
+    return idx
+
+def _PanelIndex(app, pageids):
+    """Build the MultiIndex of a panel page from its id series"""
+    panelids = str(pageids).split()
+    if len(panelids) != 2:
+        raise ValueError("EViews panel must have two id values, not " + 
+                         str(len(panelids)) + ".")
+    grp = app.GetGroup(automation.tagVARIANT(' '.join(panelids)), "@all")
+    ids = np.array(grp, dtype=object).reshape(-1, 2)
+    # from_arrays factorizes each id into codes/levels, so every
+    # observation keeps its own (id, id) pair even in unbalanced panels
+    return pa.MultiIndex.from_arrays(
+        [pa.Series(ids[:, 0]).infer_objects(), 
+         pa.Series(ids[:, 1]).infer_objects()], names = panelids)
+
+def _DataNames(pgfreq, ispanel, snames, anames, idx):
+    """Return the series to transfer (numeric first) and numeric count"""
+    # dated workfiles only carry the numeric series
+    if pgfreq == 'U':
+        colnames = list(snames) + list(anames)
+    else:
+        colnames = list(snames)
+    # panel id series already make up the index
+    if ispanel:
+        ids = [str(name).upper() for name in idx.names]
+        colnames = [name for name in colnames if str(name).upper() not in ids]
+    numeric = set(snames)
+    return colnames, len([name for name in colnames if name in numeric])
+
+def _PageIndex(app, pageinfo):
+    """Build the pandas index of the page described by pageinfo"""
+    pgfreq = pageinfo[2]
+    wflength = int(float(pageinfo[4]))
+    if int(float(pageinfo[3])):
+        return _PanelIndex(app, pageinfo[7])
+    # regular frequencies are computed instead of transferring @date
+    if pgfreq != 'U':
+        idx = _RegularIndex(pgfreq, wflength, pageinfo[8], pageinfo[9])
+        if idx is not None:
+            return idx
+    # EViews : pandas
+    dt_map = {'D5':'B', '5':'B', 'D7':'D', '7':'D', 'D':'D',
+              'W':'W', 'T':'10D', 'F':'2W', 'M':'MS', 'Q':'QS',
+              'S':'6M', 'A':'YS', 'Y':'YS',
+              'H':'H', 'Min':'T', 'Sec':'S'} # also 'D7':'D', 'Min':'min'
     # build *Index object
     search_obj = re.search(r'(\d*)(\w*)', pgfreq)
     if search_obj:
@@ -378,60 +785,250 @@ replicated in pandas.")
         idx = pa.RangeIndex(start = 0, stop = wflength)
     else:
         raise ValueError('Unsupported workfile frequency: ' + pgfreq)
-    # convert series names to a space delimited string
-    names_str = ' '.join(names)
+    return idx
+
+def PutPythonChunksAsWF(chunks, index, app=None, newwf=True, chunk_obs=None, 
+                        marshal=None):
+    """Push Python data to EViews one block of observations at a time."""
+    app = _GetApp(app)
+    # create the page once from the full index
+    if isinstance(index, pa.DatetimeIndex):
+        create = _BuildFromPandas(index, newwf)
+        nobs = len(index)
+    else:
+        nobs = index if isinstance(index, int) else len(index)
+        create = _BuildFromPython(nobs, newwf)
+    Run(create, app)
+    # a single DataFrame is split into windows of chunk_obs rows
+    if isinstance(chunks, pa.DataFrame):
+        frame = chunks
+        step = chunk_obs or max(len(frame), 1)
+        chunks = (frame.iloc[start:start + step] 
+                  for start in range(0, len(frame), step))
+    attrs = {}
+    columns = None
+    position = 0
+    for chunk in chunks:
+        if isinstance(chunk, pa.Series):
+            chunk = chunk.to_frame(chunk.name or "series")
+        if len(chunk) == 0:
+            continue
+        if columns is None:
+            _CheckReservedNames(chunk.columns)
+            columns = list(chunk.columns)
+            attrs = chunk.attrs
+        # dated chunks are placed by their first date, others in sequence
+        if isinstance(index, pa.DatetimeIndex):
+            position = index.get_loc(chunk.index[0])
+        if position + len(chunk) > nobs:
+            raise ValueError('Chunk does not fit in the workfile range.')
+        smpl = '@first+' + str(position) + ' @first+' + \
+               str(position + len(chunk) - 1)
+        for col in chunk.columns:
+            _PutColumn(app, col, chunk[col], marshal, smpl)
+        position = position + len(chunk)
+    # copy attributes of the first chunk into each series
+    if columns and attrs:
+        lines = [str(col) + '.setattr(' + str(key) + ') ' + str(value)
+                 for col in columns for key, value in attrs.items()]
+        _RunProgram(app, lines)
+
+def _RowHashes(values):
+    """Per-row content hashes of a column or index"""
+    return pa.util.hash_pandas_object(values, index=False).to_numpy()
+
+def _Digest(rowhashes):
+    """Single digest of a block of row hashes"""
+    return hashlib.sha1(rowhashes.tobytes()).hexdigest()
+
+def _IndexFreq(index):
+    """Frequency of a DatetimeIndex as pushed to EViews, or None"""
+    if not isinstance(index, pa.DatetimeIndex):
+        return None
+    if index.freq is not None:
+        return index.freq
+    try:
+        return pa.infer_freq(index)
+    except (TypeError, ValueError):     # fewer than three dates
+        return None
+
+def _ContinuesPage(index, oldobs, freq):
+    """Do the observations past oldobs follow on at the page frequency?"""
+    if not isinstance(index, pa.DatetimeIndex) or len(index) == oldobs:
+        return True
+    if freq is None or oldobs == 0:
+        return False
+    expected = pa.date_range(index[oldobs - 1], 
+                             periods=len(index) - oldobs + 1, freq=freq)
+    return expected.equals(index[oldobs - 1:])
+
+def _SyncStates(app):
+    """Sync states of app, forgotten when the app is garbage collected"""
+    states = _syncstate.get(id(app))
+    if states is None:
+        states = _syncstate[id(app)] = {}
+        try:
+            weakref.finalize(app, _ForgetSync, id(app), states)
+        except TypeError:   # app can't be weakly referenced
+            pass
+    return states
+
+def _ForgetSync(appid, states):
+    """Drop the sync states of a collected app (unless id was reused)"""
+    if _syncstate.get(appid) is states:
+        del _syncstate[appid]
+
+def SyncPythonAsWF(obj, app=None, newwf=True, key=None, marshal=None):
+    """Push only what changed in a DataFrame since the last sync."""
+    app = _GetApp(app)
+    if (not isinstance(obj, pa.DataFrame) or 
+        isinstance(obj.index, pa.MultiIndex)):
+        raise ValueError('Only DataFrames with a single index level can be synced.')
+    _CheckReservedNames(obj.columns)
+    states = _SyncStates(app)
+    state = states.get(key)
+    nobs = len(obj)
+    oldobs = state['nobs'] if state else 0
+    idxhashes = _RowHashes(obj.index)
+    # only a page whose index is a prefix of the new one, and whose new
+    # dates extend it at its frequency, can be updated in place; anything 
+    # else is pushed from scratch
+    if (state is None or nobs < oldobs or 
+        _Digest(idxhashes[:oldobs]) != state['index'] or
+        not _ContinuesPage(obj.index, oldobs, state['freq']) or
+        _PageInfo(app) != state['page']):
+        PutPythonAsWF(obj, app, newwf, marshal)
+        freq = _IndexFreq(obj.index)
+        hashes = dict((col, _Digest(_RowHashes(obj[col]))) 
+                      for col in obj.columns)
+    else:
+        freq = state['freq']
+        newobs = nobs - oldobs
+        if newobs > 0:
+            Run('pagestruct(end=@last+' + str(newobs) + ')', app)
+        smpl = '@last-' + str(newobs - 1) + ' @last'
+        hashes = {}
+        for col in obj.columns:
+            rowhashes = _RowHashes(obj[col])
+            hashes[col] = _Digest(rowhashes)
+            if hashes[col] == state['hashes'].get(col):
+                continue
+            if _Digest(rowhashes[:oldobs]) == state['hashes'].get(col):
+                # existing observations unchanged: write the new ones only
+                _PutColumn(app, col, obj[col].iloc[oldobs:], marshal, smpl)
+            else:
+                _PutColumn(app, col, obj[col], marshal)
+        dropped = [str(col) for col in state['hashes'] if col not in hashes]
+        if dropped:
+            app.Run('delete ' + ' '.join(dropped))
+        # (re)apply attributes to new columns, or to all if they changed
+        if obj.attrs != state['attrs']:
+            attrcols = obj.columns
+        else:
+            attrcols = [col for col in obj.columns if col not in state['hashes']]
+        lines = [str(col) + '.setattr(' + str(attr) + ') ' + str(value)
+                 for col in attrcols for attr, value in obj.attrs.items()]
+        if lines:
+            _RunProgram(app, lines)
+    # a column hash also matches the unchanged prefix of the next sync
+    states[key] = {'nobs': nobs, 'index': _Digest(idxhashes), 
+                   'hashes': hashes, 'attrs': dict(obj.attrs), 'freq': freq,
+                   'page': _PageInfo(app)}
+
+def GetWFAsPython(app=None, wfname='', pagename='', namefilter='*', 
+                  attrs=True, alphas='object', datecols=(), dtype=None, 
+                  cache=None):
+    """Move EViews data to Python.
+
+    Series that arrive over COM as dates become datetime64 columns. Series
+    that hold EViews date numbers are not detected from their display
+    format; name them in datecols (a name or a list of names) to have them
+    converted to datetime64.
+    """
+    if isinstance(datecols, str):
+        datecols = [datecols]
+    # unchanged workfiles on disk are served from the cache (a WFCache)
+    key = None
+    if cache is not None:
+        key = cache.Key(wfname, pagename, namefilter, 
+                        (attrs, alphas, sorted(datecols), dtype))
+        data = cache.Load(key, alphas)
+        if data is not None:
+            return data
+    app = _GetApp(app)
+    _SelectPage(app, wfname, pagename)
+    with _Phase(app, 'index'):
+        pgfreq, ispanel, snames, anames, idx = _PageLayout(app, namefilter)
+    names = snames + anames
+    colnames, nnumeric = _DataNames(pgfreq, ispanel, snames, anames, idx)
     # retrieve all series+alpha data as a single call
-    if len(names) != 0: 
-        grp = app.GetGroup(automation.tagVARIANT(names_str), "@all")
+    # (panel pages get their MultiIndex straight from the id series)
+    if len(colnames) != 0:
+        with _Phase(app, 'transfer'):
+            grp = app.GetGroup(automation.tagVARIANT(' '.join(colnames)), "@all")
+        with _Phase(app, 'assembly'):
+            data = _GroupAsFrame(grp, colnames, nnumeric, idx, alphas, 
+                                 datecols, dtype)
     else:   # wf is empty
-        grp = None
-    if pgfreq == 'U' and len(names) != 0:
-        dfr = pa.DataFrame(index = idx, columns=list(names))
-        # for each series name, extract the data from our grp array
-        for sindex in range(len(names)):
-            dfr[names[sindex]] = [col[sindex] for col in grp]
-        data = dfr
-    elif pgfreq == 'U' and len(names) == 0:
-        dfr = pa.DataFrame(index = idx)
-        data = dfr
-    elif pgfreq != 'U' and len(names) != 0:
-        # for dated workfiles create the dataframe
-        # build dataframe with empty columns 
-        dfr = pa.DataFrame(index=idx, columns=list(snames))
-        #for each series name, extract the data from our grp array
-        for sindex in range(len(snames)):
-            dfr[snames[sindex]] = [col[sindex] for col in grp]
-        data = dfr
-    elif pgfreq != 'U' and len(names) == 0:
-        dfr = pa.DataFrame(index = idx)
-        data = dfr
-    if ispanel:
-        panelids = app.Get("=@pageids").split()
-        if len(panelids) != 2:
-            raise ValueError("EViews panel must have two id values, not " + len(panelids) + ".")
-        data = pa.DataFrame(data = dfr.drop(panelids, axis = 'columns').to_numpy(),\
-                            index = pa.MultiIndex.from_product([dfr[panelids[0]].unique(), dfr[panelids[1]].unique()],\
-                            names = panelids), columns = dfr.columns.drop(panelids))
-    # get all attribute names
-    for var in names:
-        attrnames = app.Get('=@attrnames("*", "' + str(var) + '")').split()
-        if attrnames and not ispanel:
-            attrvals = []
-            for attr in attrnames:
-                tempvar = app.Get('=@getnextname("TEMP")') 
-                app.Run('string ' + str(tempvar) + ' = ' + str(var).strip() + '.@attr("' + str(attr) + '")')
-                attrvals.append(app.Get(str(tempvar)))
-                app.Run('delete ' + str(tempvar))
-            data.attrs.update(dict(zip(attrnames, attrvals)))
+        data = pa.DataFrame(index = idx)
+    # get all attribute names and values with a single program
+    if attrs and not ispanel:
+        with _Phase(app, 'attrs'):
+            for varattrs in _GetAttrs(app, names).values():
+                data.attrs.update(varattrs)
     # close the workfile
     #app.Run("wfclose")   
+    if key is not None:
+        cache.Store(key, data)
     return data
     
+def IterWFAsPython(app=None, wfname='', pagename='', namefilter='*', 
+                   chunk_obs=None, chunk_series=None, attrs=True, 
+                   alphas='object', datecols=(), dtype=None):
+    """Move EViews data to Python in chunks of observations/series.
+
+    Options (alphas, datecols, dtype) work as in GetWFAsPython.
+    """
+    if isinstance(datecols, str):
+        datecols = [datecols]
+    app = _GetApp(app)
+    _SelectPage(app, wfname, pagename)
+    pgfreq, ispanel, snames, anames, idx = _PageLayout(app, namefilter)
+    if ispanel and chunk_obs:
+        raise ValueError('Panel workfiles can only be chunked by series.')
+    colnames, nnumeric = _DataNames(pgfreq, ispanel, snames, anames, idx)
+    nobs = len(idx)
+    obs_step = chunk_obs or max(nobs, 1)
+    ser_step = chunk_series or max(len(colnames), 1)
+    batchattrs = {}
+    for obs_start in range(0, max(nobs, 1), obs_step):
+        obs_end = min(obs_start + obs_step, nobs)
+        # sample window relative to the start of the page
+        smpl = '@first+' + str(obs_start) + ' @first+' + str(obs_end - 1)
+        chunkidx = idx[obs_start:obs_end]
+        if len(colnames) == 0:   # wf is empty
+            yield pa.DataFrame(index = chunkidx)
+            continue
+        for ser_start in range(0, len(colnames), ser_step):
+            batch = colnames[ser_start:ser_start + ser_step]
+            batchnumeric = max(0, min(nnumeric - ser_start, len(batch)))
+            grp = app.GetGroup(automation.tagVARIANT(' '.join(batch)), smpl)
+            data = _GroupAsFrame(grp, batch, batchnumeric, chunkidx, alphas, 
+                                 datecols, dtype)
+            # attributes only need fetching once per series batch
+            if attrs and not ispanel:
+                if ser_start not in batchattrs:
+                    batchattrs[ser_start] = _GetAttrs(app, batch)
+                for varattrs in batchattrs[ser_start].values():
+                    data.attrs.update(varattrs)
+            yield data
+
 def GetEViewsApp(version='EViews.Manager', instance='either', showwindow=False): 
     """Allow for more control of the app"""
     # get manager object
     # this is an optional function for greater control of the app object
     # otherwise can just use the global app object
+    from comtypes.client import CreateObject
     try:
         mgr = CreateObject(version)
     except WindowsError:
@@ -462,12 +1059,120 @@ def Run(command, app=None):
     """Send commands to EViews."""
     app = _GetApp(app)
     app.Run(command)   
+    _CheckStructural(app, command)
+
+def _CheckStructural(app, command):
+    """Drop cached page indexes if command changes workfile structure"""
+    words = str(command).split(None, 1)
+    if words and words[0].split('(')[0].lower() in _STRUCTURAL_COMMANDS:
+        ClearPageCache(app)
+        # synced pages can no longer be updated in place
+        _syncstate.get(id(app), {}).clear()
     
 def Get(objname, app=None):
     """Retrieve the results of EViews commands."""
     app = _GetApp(app)
     return app.Get(objname)
 
+class BatchResult(object):
+    """Deferred result of Batch.Get, available once the batch has run"""
+
+    def __init__(self, objname):
+        self.objname = objname
+        self.ready = False
+        self._value = None
+
+    @property
+    def value(self):
+        if not self.ready:
+            raise ValueError('Batch has not been run yet: ' + str(self.objname))
+        return self._value
+
+class Batch(object):
+    """Buffer EViews commands and run them as a single program.
+
+    Use as ``with Batch(app) as b: b.Run(...)``; the buffered commands run
+    when the block exits (or on Flush). Get returns a BatchResult that is
+    filled in at the point of the batch where it was requested.
+    """
+
+    def __init__(self, app=None):
+        self.app = _GetApp(app)
+        self._ops = []
+        self._line = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.Flush()
+        else:
+            self._ops = []
+
+    def Run(self, command):
+        """Queue a command."""
+        self._ops.append(('run', str(command)))
+
+    def Get(self, objname):
+        """Queue a Get; returns a BatchResult."""
+        result = BatchResult(objname)
+        self._ops.append(('get', result))
+        return result
+
+    def Flush(self):
+        """Send the queued commands to EViews."""
+        ops, self._ops = self._ops, []
+        lines = []
+        for kind, item in ops:
+            if kind == 'run':
+                lines.append(item)
+                continue
+            # a Get sees the workfile as left by the commands before it
+            self._Execute(lines)
+            lines = []
+            item._value = self.app.Get(item.objname)
+            item.ready = True
+        self._Execute(lines)
+
+    def _Execute(self, lines):
+        """Run commands as one program, reporting the failing line"""
+        if not lines:
+            return
+        first = self._line
+        self._line = self._line + len(lines)
+        try:
+            if len(lines) == 1:
+                self.app.Run(lines[0])
+            else:
+                _RunProgram(self.app, lines)
+        except Exception as exc:
+            lineno = _FailingLine(str(exc), lines)
+            if lineno is None:
+                raise ValueError('Batch failed in lines ' + str(first + 1) + 
+                                 '-' + str(first + len(lines)) + ': ' + 
+                                 str(exc)) from exc
+            raise ValueError('Batch failed at line ' + str(first + lineno) + 
+                             ' (' + lines[lineno - 1] + '): ' + 
+                             str(exc)) from exc
+        finally:
+            for line in lines:
+                _CheckStructural(self.app, line)
+
+def _FailingLine(message, lines):
+    """Locate the program line (1-based) an EViews error refers to"""
+    if len(lines) == 1:
+        return 1
+    search_obj = re.search(r'line (\d+)', message, re.IGNORECASE)
+    if search_obj and 0 < int(search_obj.group(1)) <= len(lines):
+        return int(search_obj.group(1))
+    # otherwise EViews quotes the offending command
+    for quoted in re.findall(r'"([^"]+)"', message):
+        for lineno, line in enumerate(lines, 1):
+            if line.strip().lower() == quoted.strip().lower():
+                return lineno
+    return None
+
 def _MissingElements(listy):
     """Find missing elements in a sorted integer sequence.
     From: https://stackoverflow.com/questions/16974047/efficient-way-to-find-missing-elements-in-an-integer-sequence"""
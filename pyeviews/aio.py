@@ -0,0 +1,102 @@
+"""pyeviews.aio: Use EViews from asyncio code.
+
+Every app instance gets its own executor thread, so calls to one instance
+run one at a time in order while different instances proceed concurrently.
+Awaiting a call can be cancelled or given a timeout; a call that has not
+started yet is dropped, one already running inside EViews completes in the
+background and its result is discarded.
+
+Apps must come from aio.GetEViewsApp (or be None for the default app), so
+that every call reaches an app on the thread that created it. An app's
+thread stops when the app is garbage collected or passed to Close.
+"""
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+import pyeviews
+from pyeviews.pool import _CoInitialize
+
+# one single-thread executor per app made by GetEViewsApp, by id(app);
+# an entry is dropped when its app is collected, before the id is reused
+_executors = {}
+_default = None
+_lock = threading.RLock()   # finalizers may run during a locked section
+
+def _NewExecutor():
+    """Single worker thread with COM initialized for its apartment"""
+    return ThreadPoolExecutor(max_workers=1, initializer=_CoInitialize,
+                              thread_name_prefix='pyeviews-aio')
+
+def _Executor(app):
+    """Return the executor that serializes calls to app"""
+    global _default
+    with _lock:
+        if app is None:
+            if _default is None:
+                _default = _NewExecutor()
+            return _default
+        executor = _executors.get(id(app))
+    if executor is None:
+        raise ValueError('App was not created by pyeviews.aio.GetEViewsApp '
+                         'or has been closed.')
+    return executor
+
+def _Release(key, executor):
+    """Forget the executor of a collected app and stop its thread"""
+    with _lock:
+        if _executors.get(key) is executor:
+            del _executors[key]
+    executor.shutdown(wait=False)
+
+async def _Call(executor, timeout, func, *args, **kwargs):
+    """Run func on executor and await it (cancel/timeout aware)"""
+    future = executor.submit(func, *args, **kwargs)
+    # cancelling the awaitable also cancels the pending executor job
+    return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+
+async def GetEViewsApp(version='EViews.Manager', instance='either',
+                       showwindow=False, timeout=None):
+    """Create an app on its own executor thread."""
+    executor = _NewExecutor()
+    try:
+        app = await _Call(executor, timeout, pyeviews.GetEViewsApp, version,
+                          instance, showwindow)
+    except BaseException:
+        executor.shutdown(wait=False)
+        raise
+    with _lock:
+        _executors[id(app)] = executor
+    weakref.finalize(app, _Release, id(app), executor)
+    return app
+
+async def Run(command, app=None, timeout=None):
+    """Send commands to EViews."""
+    return await _Call(_Executor(app), timeout, pyeviews.Run, command, app)
+
+async def Get(objname, app=None, timeout=None):
+    """Retrieve the results of EViews commands."""
+    return await _Call(_Executor(app), timeout, pyeviews.Get, objname, app)
+
+async def PutPythonAsWF(obj, app=None, newwf=True, timeout=None, **kwargs):
+    """Push Python data to EViews."""
+    return await _Call(_Executor(app), timeout, pyeviews.PutPythonAsWF, obj,
+                       app, newwf, **kwargs)
+
+async def GetWFAsPython(app=None, wfname='', pagename='', namefilter='*',
+                        timeout=None, **kwargs):
+    """Move EViews data to Python."""
+    return await _Call(_Executor(app), timeout, pyeviews.GetWFAsPython, app,
+                       wfname, pagename, namefilter, **kwargs)
+
+def Close(app=None, wait=True):
+    """Stop the executor thread of app (or of the default app)"""
+    global _default
+    with _lock:
+        if app is None:
+            executor, _default = _default, None
+        else:
+            executor = _executors.pop(id(app), None)
+    if executor is not None:
+        executor.shutdown(wait=wait)
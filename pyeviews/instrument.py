@@ -0,0 +1,145 @@
+"""pyeviews.instrument: Call metrics for the COM interaction with EViews."""
+import bisect
+import contextlib
+import logging
+import threading
+import time
+
+# COM methods of the EViews app that are timed and counted
+_TRACKED = ('Run', 'Get', 'Put', 'PutSeries', 'GetGroup', 'GetSeries',
+            'Lookup')
+
+# upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.0001, 0.001, 0.01, 0.1, 1.0, 10.0, float('inf'))
+
+# size of one element in a SAFEARRAY of VARIANTs
+_VARIANT_BYTES = 16
+
+def _Size(data):
+    """Return (elements, bytes) of data going to or coming from COM"""
+    if hasattr(data, 'nbytes') and hasattr(data, 'size'):    # ndarray
+        return int(data.size), int(data.nbytes)
+    if isinstance(data, (list, tuple)):
+        if data and isinstance(data[0], (list, tuple)):      # 2-D
+            elements = len(data) * len(data[0])
+        else:
+            elements = len(data)
+        return elements, elements * _VARIANT_BYTES
+    if data is None:
+        return 0, 0
+    if isinstance(data, (int, float, str, bool)):
+        return 1, _VARIANT_BYTES
+    return 0, 0     # already marshalled, see InstrumentedApp.WrapMarshal
+
+def _NewCallStats():
+    return {'count': 0, 'errors': 0, 'seconds': 0.0, 'elements': 0,
+            'bytes': 0, 'histogram': [0] * len(LATENCY_BUCKETS)}
+
+class InstrumentedApp(object):
+    """Wrap an EViews app and record metrics for every COM call.
+
+    Per method: call count, errors, total seconds, a latency histogram
+    (see LATENCY_BUCKETS) and elements/bytes transferred. Phases timed
+    inside PutPythonAsWF/GetWFAsPython ('index', 'transfer', 'assembly',
+    'attrs') are recorded too. callback(event) is called after every COM
+    call with a dict describing it; log=True also logs each call at DEBUG.
+    Untracked attributes pass straight through to the wrapped app.
+    """
+
+    def __init__(self, app, callback=None, log=False):
+        self.app = app
+        self.callback = callback
+        self.log = log
+        self._lock = threading.Lock()
+        self._pending = threading.local()
+        self.Reset()
+
+    def __getattr__(self, name):
+        attr = getattr(self.app, name)
+        if name not in _TRACKED:
+            return attr
+        def call(*args, **kwargs):
+            return self._Call(name, attr, args, kwargs)
+        return call
+
+    def _Call(self, name, method, args, kwargs):
+        """Time one COM call and record its size"""
+        pending = getattr(self._pending, 'size', None)
+        self._pending.size = None
+        start = time.perf_counter()
+        error = None
+        try:
+            result = method(*args, **kwargs)
+            return result
+        except Exception as exc:
+            error = exc
+            result = None
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            if pending is not None:
+                elements, nbytes = pending
+            elif name in ('Put', 'PutSeries') and len(args) > 1:
+                elements, nbytes = _Size(args[1])
+            elif name in ('Get', 'GetGroup', 'GetSeries', 'Lookup'):
+                elements, nbytes = _Size(result)
+            else:
+                elements, nbytes = 0, 0
+            self._Record(name, seconds, elements, nbytes, error)
+
+    def _Record(self, name, seconds, elements, nbytes, error):
+        with self._lock:
+            stats = self._calls.setdefault(name, _NewCallStats())
+            stats['count'] = stats['count'] + 1
+            stats['seconds'] = stats['seconds'] + seconds
+            stats['elements'] = stats['elements'] + elements
+            stats['bytes'] = stats['bytes'] + nbytes
+            stats['histogram'][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            if error is not None:
+                stats['errors'] = stats['errors'] + 1
+        event = {'method': name, 'seconds': seconds, 'elements': elements,
+                 'bytes': nbytes, 'error': error}
+        if self.log:
+            logging.debug("EViews %s: %.6fs, %d elements, %d bytes%s", name,
+                          seconds, elements, nbytes,
+                          '' if error is None else ' (' + str(error) + ')')
+        if self.callback is not None:
+            self.callback(event)
+
+    def WrapMarshal(self, marshal):
+        """Record the size of data before marshal turns it into a VARIANT"""
+        def wrapped(data):
+            self._pending.size = _Size(data)
+            return marshal(data)
+        return wrapped
+
+    @contextlib.contextmanager
+    def Phase(self, name):
+        """Time a phase of a transfer (index build, transfer, assembly)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            with self._lock:
+                stats = self._phases.setdefault(name, {'count': 0,
+                                                       'seconds': 0.0})
+                stats['count'] = stats['count'] + 1
+                stats['seconds'] = stats['seconds'] + seconds
+            if self.callback is not None:
+                self.callback({'phase': name, 'seconds': seconds})
+
+    def Stats(self):
+        """Return a snapshot of the recorded call and phase metrics"""
+        with self._lock:
+            calls = dict((name, dict(stats, histogram=list(stats['histogram'])))
+                         for name, stats in self._calls.items())
+            phases = dict((name, dict(stats))
+                          for name, stats in self._phases.items())
+        return {'calls': calls, 'phases': phases}
+
+    def Reset(self):
+        """Clear all recorded metrics"""
+        with self._lock:
+            self._calls = {}
+            self._phases = {}
@@ -0,0 +1,257 @@
+"""pyeviews.pool: Spread work across several EViews instances."""
+import gc
+import queue
+import threading
+from concurrent.futures import Future
+
+def _CoInitialize():
+    """Initialize COM for the calling thread (no-op without comtypes)"""
+    try:
+        import comtypes
+    except ImportError:     # fake apps off-Windows
+        return False
+    comtypes.CoInitialize()
+    return True
+
+def _CoUninitialize():
+    """Release COM for the calling thread"""
+    import comtypes
+    comtypes.CoUninitialize()
+
+def _IsComError(exc):
+    """Is exc an error raised by COM rather than by the job itself?"""
+    return isinstance(exc, OSError) or type(exc).__name__ == 'COMError'
+
+def _Ping(app):
+    """Default health check: evaluate a trivial expression"""
+    return app.Get("=1") == 1
+
+def _NewApp():
+    """Default factory: a fresh EViews instance"""
+    from pyeviews import GetEViewsApp
+    return GetEViewsApp(instance='new')
+
+class _PooledApp(object):
+    """Checked out app: forwards calls to the thread that owns the app"""
+
+    def __init__(self, pool, worker):
+        self._pool = pool
+        self._worker = worker
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            worker = self._worker
+            if worker is None:
+                raise ValueError('App has been returned to the pool.')
+            return worker.Call(name, args, kwargs)
+        return call
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._pool.Checkin(self)
+
+class _PoolWorker(threading.Thread):
+    """Thread owning one EViews app, created and used in its apartment"""
+
+    def __init__(self, pool):
+        threading.Thread.__init__(self, daemon=True)
+        self.pool = pool
+        self.app = None
+        self.jobs = 0
+        self.calls = queue.Queue()
+        self.recycle = False
+        self.lease = None
+
+    def run(self):
+        coinit = _CoInitialize()
+        try:
+            while True:
+                job = self.pool._jobs.get()
+                if job is None:
+                    break
+                kind, future, payload = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if kind == 'lease':
+                    self._Lease(future)
+                else:
+                    self._Task(future, payload)
+                self._Maintain()
+        finally:
+            self.app = None
+            gc.collect()
+            if coinit:
+                _CoUninitialize()
+
+    def _App(self):
+        """Return this thread's app, creating it on first use"""
+        if self.app is None:
+            self.app = self.pool.factory()
+            self.jobs = 0
+            self.recycle = False
+        return self.app
+
+    def _Task(self, future, payload):
+        """Run one submitted job against this thread's app"""
+        func, args, kwargs = payload
+        try:
+            result = func(self._App(), *args, **kwargs)
+        except BaseException as exc:
+            self._Failed(exc)
+            future.set_exception(exc)
+        else:
+            future.set_result(result)
+        self.jobs = self.jobs + 1
+
+    def _Lease(self, future):
+        """Serve calls from a checked out proxy until it is returned"""
+        try:
+            self._App()
+        except BaseException as exc:
+            future.set_exception(exc)
+            return
+        with self.pool._lock:
+            if self.pool._closed:
+                future.set_exception(ValueError('Pool is closed.'))
+                return
+            lease = self.lease = _PooledApp(self.pool, self)
+        future.set_result(lease)
+        while True:
+            call = self.calls.get()
+            if call is None:
+                break
+            name, args, kwargs, result = call
+            try:
+                value = getattr(self.app, name)(*args, **kwargs)
+            except BaseException as exc:
+                self._Failed(exc)
+                result.set_exception(exc)
+            else:
+                result.set_result(value)
+        self.jobs = self.jobs + 1
+
+    def _Failed(self, exc):
+        """Decide whether a failed call leaves the app unusable"""
+        if _IsComError(exc):
+            self.recycle = True
+        elif self.pool.healthcheck is not None and self.app is not None:
+            try:
+                self.recycle = not self.pool.healthcheck(self.app)
+            except Exception:
+                self.recycle = True
+
+    def _Maintain(self):
+        """Recycle the app after COM errors or maxjobs jobs"""
+        maxjobs = self.pool.maxjobs
+        if self.recycle or (maxjobs and self.jobs >= maxjobs):
+            self.app = None
+            self.recycle = False
+            self.jobs = 0
+            gc.collect()
+            self.pool._Recycled()
+
+    def Call(self, name, args, kwargs):
+        """Run app.name(*args, **kwargs) on this thread (from any thread)"""
+        result = Future()
+        result.set_running_or_notify_cancel()
+        self.calls.put((name, args, kwargs, result))
+        return result.result()
+
+class EViewsPool(object):
+    """Pool of EViews app instances for parallel workloads.
+
+    Each instance lives on its own COM-initialized thread. Jobs passed to
+    Submit/Map are called as func(app, *args) on whichever instance is
+    free; Checkout() reserves an instance and returns a proxy whose calls
+    run on the owning thread. Instances are recycled after maxjobs jobs,
+    on COM errors, or when healthcheck(app) fails after an error. Close
+    takes back instances that are still checked out: calls through their
+    proxies raise ValueError from then on.
+    """
+
+    def __init__(self, size=2, factory=None, maxjobs=None, healthcheck=_Ping):
+        if size < 1:
+            raise ValueError('Pool size must be at least 1.')
+        self.size = size
+        self.factory = factory if factory is not None else _NewApp
+        self.maxjobs = maxjobs
+        self.healthcheck = healthcheck
+        self.recycled = 0
+        self._lock = threading.Lock()
+        self._jobs = queue.Queue()
+        self._closed = False
+        self._workers = [_PoolWorker(self) for _ in range(size)]
+        for worker in self._workers:
+            worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.Close()
+
+    def _Recycled(self):
+        with self._lock:
+            self.recycled = self.recycled + 1
+
+    def _Put(self, kind, payload=None):
+        if self._closed:
+            raise ValueError('Pool is closed.')
+        future = Future()
+        self._jobs.put((kind, future, payload))
+        return future
+
+    def Submit(self, func, *args, **kwargs):
+        """Schedule func(app, *args, **kwargs) on a free instance"""
+        return self._Put('task', (func, args, kwargs))
+
+    def Map(self, func, items, timeout=None):
+        """Run func(app, item) for every item, yielding results in order"""
+        futures = [self.Submit(func, item) for item in items]
+        def results():
+            try:
+                for future in futures:
+                    yield future.result(timeout)
+            finally:
+                for future in futures:
+                    future.cancel()
+        return results()
+
+    def Checkout(self, timeout=None):
+        """Reserve a free instance and return a proxy to it"""
+        future = self._Put('lease')
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # if a worker picked the lease up in the meantime, hand it back
+            if not future.cancel() and future.exception() is None:
+                self.Checkin(future.result())
+            raise
+
+    def Checkin(self, app):
+        """Return a checked out instance to the pool"""
+        with self._lock:
+            worker, app._worker = app._worker, None
+            if worker is not None:
+                worker.lease = None
+        if worker is not None:
+            worker.calls.put(None)
+
+    def Close(self, wait=True):
+        """Stop the workers and release their instances"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            leases = [worker.lease for worker in self._workers 
+                      if worker.lease is not None]
+        # checked out instances are taken back, their proxies stop working
+        for app in leases:
+            self.Checkin(app)
+        for _ in self._workers:
+            self._jobs.put(None)
+        if wait:
+            for worker in self._workers:
+                worker.join()
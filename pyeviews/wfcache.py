@@ -0,0 +1,241 @@
+"""pyeviews.wfcache: On-disk cache of pages pulled from workfiles."""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+_FORMAT = 2     # bump when the layout of an entry changes
+
+def _DefaultPath():
+    return os.path.join(tempfile.gettempdir(), 'pyeviews-cache')
+
+def _SaveValues(values, path, name):
+    """Store a 1-D array/index as .npy (or inline for objects)"""
+    import numpy as np
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        # stored in their own unit: [ns] can't hold dates before 1677
+        np.save(os.path.join(path, name + '.npy'), values.view(np.int64))
+        return {'kind': 'datetime', 'file': name + '.npy',
+                'unit': np.datetime_data(values.dtype)[0]}
+    if values.dtype.kind in 'biuf':
+        np.save(os.path.join(path, name + '.npy'), values)
+        return {'kind': 'numeric', 'file': name + '.npy'}
+    return {'kind': 'object', 'values': values.tolist()}
+
+def _LoadValues(desc, path):
+    """Inverse of _SaveValues (numeric/date arrays are memory-mapped)"""
+    import numpy as np
+    if desc['kind'] == 'object':
+        return np.array(desc['values'], dtype=object)
+    values = np.load(os.path.join(path, desc['file']), mmap_mode='c')
+    if desc['kind'] == 'datetime':
+        return values.view('datetime64[' + desc['unit'] + ']')
+    return values
+
+def _SaveIndex(idx, path):
+    import pandas as pa
+    if isinstance(idx, pa.RangeIndex):
+        return {'type': 'range', 'start': idx.start, 'stop': idx.stop,
+                'step': idx.step}
+    if isinstance(idx, pa.MultiIndex):
+        levels = []
+        for num in range(idx.nlevels):
+            levels.append({
+                'values': _SaveValues(idx.levels[num], path, 'level' + str(num)),
+                'codes': _SaveValues(idx.codes[num], path, 'codes' + str(num))})
+        return {'type': 'multi', 'levels': levels, 'names': list(idx.names)}
+    return {'type': 'index', 'values': _SaveValues(idx, path, 'index'),
+            'name': idx.name, 'freq': getattr(idx, 'freqstr', None)}
+
+def _LoadIndex(desc, path):
+    import pandas as pa
+    if desc['type'] == 'range':
+        return pa.RangeIndex(desc['start'], desc['stop'], desc['step'])
+    if desc['type'] == 'multi':
+        return pa.MultiIndex(
+            levels=[_LoadValues(level['values'], path)
+                    for level in desc['levels']],
+            codes=[_LoadValues(level['codes'], path)
+                   for level in desc['levels']],
+            names=desc['names'])
+    values = _LoadValues(desc['values'], path)
+    if desc['freq'] is not None:
+        return pa.DatetimeIndex(values, freq=desc['freq'], name=desc['name'])
+    return pa.Index(values, name=desc['name'])
+
+def _EntrySize(path):
+    return sum(os.path.getsize(os.path.join(path, name))
+               for name in os.listdir(path))
+
+def _Remove(path):
+    """Delete an entry, returning the bytes of files still in use"""
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        return _EntrySize(path)
+    except OSError:
+        return 0
+
+class WFCache(object):
+    """Local cache of GetWFAsPython results for workfiles on disk.
+
+    Entries are keyed by workfile path, modification time and size, page,
+    namefilter and pull options, so a changed workfile is a cache miss.
+    Numeric and date columns are stored as .npy files and memory-mapped
+    copy-on-write on load, so changes to a loaded frame stay in memory;
+    alpha columns as codes plus categories in the JSON sidecar.
+    The least recently used entries are evicted beyond maxbytes.
+    """
+
+    def __init__(self, path=None, maxbytes=2**30):
+        self.path = path if path is not None else _DefaultPath()
+        self.maxbytes = maxbytes
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def Key(self, wfname, pagename='', namefilter='*', options=()):
+        """Return the entry key of a pull, or None if it can't be cached"""
+        if not wfname:
+            return None     # current workfile: no file state to check
+        try:
+            stat = os.stat(wfname)
+        except OSError:
+            return None
+        state = [_FORMAT, os.path.normcase(os.path.abspath(wfname)),
+                 stat.st_mtime_ns, stat.st_size, str(pagename).upper(),
+                 str(namefilter).upper(), [str(item) for item in options]]
+        return hashlib.sha1(json.dumps(state).encode('utf-8')).hexdigest()
+
+    def Load(self, key, alphas='object'):
+        """Return the cached DataFrame for key, or None on a miss"""
+        import numpy as np
+        import pandas as pa
+        if key is None:
+            return None
+        path = os.path.join(self.path, key)
+        try:
+            with open(os.path.join(path, 'meta.json')) as meta:
+                desc = json.load(meta)
+            idx = _LoadIndex(desc['index'], path)
+            frames = []
+            for block in desc['blocks']:
+                values = np.load(os.path.join(path, block['file']),
+                                 mmap_mode='c')
+                if block['kind'] == 'datetime':
+                    values = values.view('datetime64[' + block['unit'] + ']')
+                # stored column-major, so the frame wraps the map as-is
+                frames.append(pa.DataFrame(values.T, index=idx,
+                                           columns=block['columns'],
+                                           copy=False))
+            for col in desc['alphas']:
+                codes = np.load(os.path.join(path, col['file']), mmap_mode='c')
+                values = pa.Categorical.from_codes(codes, col['categories'])
+                if alphas == 'string':
+                    values = pa.array(np.asarray(values), dtype='string')
+                elif alphas == 'object':
+                    values = np.asarray(values, dtype=object)
+                frames.append(pa.DataFrame({col['name']: values}, index=idx))
+        except (OSError, ValueError, KeyError):
+            return None     # missing, partly evicted or unreadable
+        if frames:
+            data = pa.concat(frames, axis=1, copy=False)
+            if list(data.columns) != desc['columns']:
+                data = data[desc['columns']]
+        else:
+            data = pa.DataFrame(index=idx)
+        data.attrs.update(desc['attrs'])
+        # mark the entry as recently used
+        os.utime(os.path.join(path, 'meta.json'))
+        return data
+
+    def Store(self, key, data):
+        """Write data as the entry for key and evict old entries"""
+        import numpy as np
+        if key is None:
+            return
+        tmp = tempfile.mkdtemp(prefix='.tmp', dir=self.path)
+        try:
+            desc = {'columns': [str(col) for col in data.columns],
+                    'attrs': dict(data.attrs), 'blocks': [], 'alphas': [],
+                    'index': _SaveIndex(data.index, tmp)}
+            # one column-major block per numeric or date dtype
+            groups = {}
+            for num, col in enumerate(data.columns):
+                dtype = data[col].dtype
+                if dtype.kind in 'iuf' or (dtype.kind == 'M' and 
+                                           isinstance(dtype, np.dtype)):
+                    groups.setdefault(dtype, []).append(col)
+                else:
+                    codes, categories = _Factorize(data[col])
+                    name = 'alpha' + str(num) + '.npy'
+                    np.save(os.path.join(tmp, name), codes)
+                    desc['alphas'].append({'name': str(col), 'file': name,
+                                           'categories': categories})
+            for num, (dtype, cols) in enumerate(groups.items()):
+                name = 'block' + str(num) + '.npy'
+                block = {'kind': 'numeric', 'file': name,
+                         'columns': [str(col) for col in cols]}
+                values = data[cols].to_numpy(dtype)
+                if dtype.kind == 'M':
+                    block['kind'] = 'datetime'
+                    block['unit'] = np.datetime_data(dtype)[0]
+                    values = values.view(np.int64)
+                np.save(os.path.join(tmp, name),
+                        np.ascontiguousarray(values.T))
+                desc['blocks'].append(block)
+            with open(os.path.join(tmp, 'meta.json'), 'w') as meta:
+                json.dump(desc, meta)
+            path = os.path.join(self.path, key)
+            with self._lock:
+                shutil.rmtree(path, ignore_errors=True)
+                os.replace(tmp, path)
+        except OSError:
+            # a failed write (disk full, entry in use) only costs the cache;
+            # eviction below still retries what an in-use entry left behind
+            shutil.rmtree(tmp, ignore_errors=True)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.Evict()
+
+    def Evict(self, maxbytes=None):
+        """Drop least recently used entries until the cache fits maxbytes"""
+        maxbytes = self.maxbytes if maxbytes is None else maxbytes
+        with self._lock:
+            entries = []
+            total = 0
+            for key in os.listdir(self.path):
+                path = os.path.join(self.path, key)
+                if key.startswith('.') or not os.path.isdir(path):
+                    continue
+                meta = os.path.join(path, 'meta.json')
+                if not os.path.exists(meta):
+                    # remains of an entry whose files were still mapped by
+                    # live frames when it was removed (Windows): try again,
+                    # and count whatever can't be deleted yet
+                    total = total + _Remove(path)
+                    continue
+                size = _EntrySize(path)
+                total = total + size
+                entries.append((os.path.getmtime(meta), size, path))
+            for _, size, path in sorted(entries):
+                if total <= maxbytes:
+                    break
+                total = total - size + _Remove(path)
+
+    def Clear(self):
+        """Remove every entry"""
+        self.Evict(0)
+
+def _Factorize(column):
+    """Return int32 codes and string categories of an alpha column"""
+    import numpy as np
+    import pandas as pa
+    if isinstance(column.dtype, pa.CategoricalDtype):
+        codes, categories = column.cat.codes, column.cat.categories
+    else:
+        codes, categories = pa.factorize(column, use_na_sentinel=True)
+    return (np.asarray(codes, dtype=np.int32),
+            [str(value) for value in categories])